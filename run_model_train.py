@@ -39,6 +39,7 @@ MP['n_filters'] = [112]         # Number of filters
 MP['init'] = ['he_normal']      # Weight initialization
 MP['lambda'] = [1e-6]           # Weight regularization
 MP['dropout'] = [0.15]          # Dropout fraction
+MP['separable'] = [False]       # Depthwise-separable encoder convs (FL=3)
 
 # Iterating over parameters example.
 #    MP['N_runs'] = 2
@@ -1,11 +1,71 @@
 from __future__ import absolute_import, division, print_function
 import numpy as np
+import pytest
 from keras import backend as K
 import sys
 sys.path.append('../')
 import model_train as mt
 
 
+class TestAugmentation(object):
+    """Tests that the batched augmentation reproduces the original
+    per-sample pad/slice/np.rot90 implementation exactly."""
+
+    def setup(self):
+        np.random.seed(42)
+        self.npix = 15
+        self.bs, self.L = 8, 32
+        self.d = np.random.rand(self.bs, self.L, self.L, 1).astype('float32')
+        self.t = np.random.rand(self.bs, self.L, self.L).astype('float32')
+        # Cover negative/zero/positive and extreme shifts, and all four
+        # rotation counts.
+        self.h = np.array([-15, -7, 0, 3, 15, -1, 8, 0])
+        self.v = np.array([15, 0, -15, 5, -3, 2, 0, -8])
+        self.r = np.array([0, 1, 2, 3, 3, 2, 1, 0])
+
+    def reference(self):
+        """Original per-sample shift/rotation loop."""
+        L, npix = self.L, self.npix
+        d, t = self.d.copy(), self.t.copy()
+        for j in range(self.bs):
+            h, v = self.h[j], self.v[j]
+            d[j] = np.pad(d[j], ((npix, npix), (npix, npix), (0, 0)),
+                          mode='constant')[npix + h:L + h + npix,
+                                           npix + v:L + v + npix, :]
+            t[j] = np.pad(t[j], (npix,), mode='constant')[npix + h:L + h + npix,
+                                                          npix + v:L + v + npix]
+            d[j], t[j] = np.rot90(d[j], self.r[j]), np.rot90(t[j], self.r[j])
+        return d, t
+
+    def test_numpy_path(self):
+        ref_d, ref_t = self.reference()
+        out_d, out_t = mt._augment_batch_numpy(self.d, self.t, self.h,
+                                               self.v, self.r, self.npix)
+        assert np.array_equal(out_d, ref_d)
+        assert np.array_equal(out_t, ref_t)
+
+    def test_numba_path(self):
+        if not mt.numba_available:
+            pytest.skip('numba not installed')
+        ref_d, ref_t = self.reference()
+        out_d, out_t = np.empty_like(self.d), np.empty_like(self.t)
+        mt._augment_batch_numba(self.d, self.t, out_d, out_t,
+                                self.h, self.v, self.r)
+        assert np.array_equal(out_d, ref_d)
+        assert np.array_equal(out_t, ref_t)
+
+    def test_float16_dispatch(self):
+        # float16 batches must augment correctly on either backend.
+        ref_d, ref_t = self.reference()
+        out_d, out_t = mt._augment_batch(self.d.astype('float16'),
+                                         self.t.astype('float16'),
+                                         self.h, self.v, self.r, self.npix)
+        # The augmentation only moves/zeroes values, so the float16
+        # result equals the float32 reference quantized to float16.
+        assert np.array_equal(out_d, ref_d.astype('float16'))
+        assert np.array_equal(out_t, ref_t.astype('float16'))
+
+
 class TestModelTrain():
     """Tests model building."""
 
@@ -26,6 +86,6 @@ class TestModelTrain():
                                       set(model.trainable_weights)]))
         non_trainable_count = int(np.sum([K.count_params(p) for p in
                                           set(model.non_trainable_weights)]))
-        assert trainable_count + non_trainable_count == 10278017
-        assert trainable_count == 10278017
+        assert trainable_count + non_trainable_count == 9036161
+        assert trainable_count == 9036161
         assert non_trainable_count == 0